@@ -1,159 +1,513 @@
 import csv
 import json
 import time
+import atexit
+import asyncio
+import contextlib
 import argparse
 import os
-import requests
-from decimal import Decimal
-from typing import Any, Dict, List, Optional, Tuple
+import shutil
+import aiohttp
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from dataclasses import dataclass, fields
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
+try:
+    # optional: parses the input in C when installed, otherwise the csv module is used
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = pacsv = None
+
+try:
+    # optional: faster event loop on Linux/macOS
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # ---------- Helpers ----------
 load_dotenv()
 
-def make_session() -> requests.Session:
-    session = requests.Session()
-    adapter = requests.adapters.HTTPAdapter(max_retries=2)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    return session
+def make_session(per_host: int) -> aiohttp.ClientSession:
+    # one pooled session for the whole run, shared by every row. aiohttp only speaks
+    # HTTP/1.1, so reuse comes from keep-alive: at most `per_host` sockets (and TLS
+    # handshakes) per API host, kept open across windows
+    connector = aiohttp.TCPConnector(limit=100, limit_per_host=per_host, keepalive_timeout=60, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10))
+
+class RateLimiter:
+    """Token bucket: allows `rate` requests per `period` seconds and only waits once the bucket is empty."""
+
+    def __init__(self, rate: float, period: float = 60.0):
+        # the bucket must hold at least one whole token, or fractional rates never fire
+        self.capacity = max(rate, 1.0)
+        self.tokens = self.capacity
+        self.fill_rate = rate / period
+        self.updated = time.monotonic()
+        # created on first use: limiters are built before the event loop starts, and on
+        # Python < 3.10 a Lock binds to whichever loop is current when it is created
+        self.lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+
+# per-API limiters, filled in by run() from the --*-rate options
+RATE_LIMITS: Dict[str, RateLimiter] = {}
+
+# retry throttled / failing upstreams with exponential backoff (0.3s, 0.6s, 1.2s, ...)
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# longest Retry-After we will wait out; a slower server is reported as an error instead,
+# since the caller holds a concurrency slot while it sleeps
+MAX_RETRY_AFTER = 30.0
+
+async def safe_get(session: aiohttp.ClientSession, url: str, params: dict, limiter: Optional[RateLimiter] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    err: Optional[str] = None
+    for attempt in range(MAX_RETRIES + 1):
+        delay = BACKOFF_FACTOR * (2 ** attempt)
+        try:
+            if limiter:
+                await limiter.acquire()
+            async with session.get(url, params=params) as resp:
+                if resp.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    resp.raise_for_status()
+                    return orjson.loads(await resp.read()), None
+                err = f"{resp.status} {resp.reason}"
+                retry_after = resp.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    if float(retry_after) > MAX_RETRY_AFTER:
+                        return None, f"{err} (Retry-After {retry_after}s)"
+                    delay = max(delay, float(retry_after))
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            # network hiccups are retried like 5xx responses
+            err = str(e) or type(e).__name__
+        except Exception as e:
+            return None, str(e)
+        if attempt < MAX_RETRIES:
+            await asyncio.sleep(delay)
+    return None, err
+
+# ---------- Caches ----------
 
-def safe_get(session: requests.Session, url: str, params: dict, timeout: int = 10) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+# geocodes are stable, so they are kept for the run and persisted between runs
+GEO_CACHE: Dict[Tuple[str, str], Dict[str, Any]] = {}
+# cities the API has no results for; kept for this run only so repeats skip the request
+GEO_MISSES: Dict[Tuple[str, str], str] = {}
+# the lookup in flight per (city, country); concurrent rows for the same city await this one
+# task instead of each making a request, and it is dropped once settled
+GEO_INFLIGHT: Dict[Tuple[str, str], "asyncio.Task[Tuple[Optional[Dict[str, Any]], Optional[str]]]"] = {}
+
+# current weather is keyed by rounded coordinates and only kept briefly
+WEATHER_TTL = 600
+# coordinates sent per Open-Meteo forecast request
+WEATHER_BATCH = 100
+WEATHER_CACHE: Dict[Tuple[float, float], Tuple[float, Dict[str, Any]]] = {}
+
+def load_geo_cache(path: str) -> None:
     try:
-        resp = session.get(url, params=params, timeout=timeout)
-        resp.raise_for_status()
-        return resp.json(), None
-    except Exception as e:
-        return None, str(e)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    for key, geo in data.items():
+        # the country code never contains "|", so split on the last one
+        city, _, country = key.rpartition("|")
+        GEO_CACHE[(city, country)] = geo
+
+def save_geo_cache(path: str) -> None:
+    data = {f"{city}|{country}": geo for (city, country), geo in GEO_CACHE.items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
 
 # ---------- API Functions ----------
 
-def geocode_city(session: requests.Session, city: str, country_code: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+def cached_geocode(key: Tuple[str, str]) -> Optional[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    geo = GEO_CACHE.get(key)
+    if geo:
+        return geo, None
+    miss = GEO_MISSES.get(key)
+    if miss:
+        return None, miss
+    return None
+
+async def lookup_city(session: aiohttp.ClientSession, sem: asyncio.Semaphore, key: Tuple[str, str], city: str, country_code: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     url = "https://geocoding-api.open-meteo.com/v1/search"
     params = {"name": city, "country": country_code, "count": 1}
-    data, err = safe_get(session, url, params)
+    async with sem:
+        data, err = await safe_get(session, url, params, RATE_LIMITS.get("geocode"))
     if err:
+        # transient failures are not remembered; a later window may retry
         return None, err
+
     if not data or "results" not in data or not data["results"]:
-        return None, "No geocode results"
-    return data["results"][0], None
+        GEO_MISSES[key] = "No geocode results"
+        return None, GEO_MISSES[key]
+    result = data["results"][0]
+    geo = {"latitude": result.get("latitude"), "longitude": result.get("longitude")}
+    GEO_CACHE[key] = geo
+    return geo, None
 
-def get_weather(session: requests.Session, lat: float, lon: float) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+async def geocode_city(session: aiohttp.ClientSession, sem: asyncio.Semaphore, city: str, country_code: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    key = (city.lower(), country_code.upper())
+    hit = cached_geocode(key)
+    if hit:
+        return hit
+
+    task = GEO_INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(lookup_city(session, sem, key, city, country_code))
+        GEO_INFLIGHT[key] = task
+        task.add_done_callback(lambda _: GEO_INFLIGHT.pop(key, None))
+    # shield so one cancelled row doesn't cancel the lookup the others are waiting on
+    return await asyncio.shield(task)
+
+async def fetch_weather_batch(session: aiohttp.ClientSession, batch: List[Tuple[Tuple[float, float], Tuple[float, float]]]) -> Optional[str]:
+    # Open-Meteo takes comma-separated coordinate lists and answers in the same order
     url = "https://api.open-meteo.com/v1/forecast"
-    params = {"latitude": lat, "longitude": lon, "current_weather": True}
-    data, err = safe_get(session, url, params)
+    params = {
+        "latitude": ",".join(str(lat) for _, (lat, _) in batch),
+        "longitude": ",".join(str(lon) for _, (_, lon) in batch),
+        "current_weather": "true",
+    }
+    data, err = await safe_get(session, url, params, RATE_LIMITS.get("weather"))
     if err:
-        return None, err
-    return data.get("current_weather"), None
+        return err
+
+    # a single location comes back as an object, several as a list
+    if isinstance(data, dict):
+        data = [data]
+    fetched_at = time.monotonic()
+    for (key, _), item in zip(batch, data):
+        weather = item.get("current_weather")
+        if weather:
+            WEATHER_CACHE[key] = (fetched_at, weather)
+    return None
 
-def convert_fx_to_usd(session: requests.Session, local_currency: str, amount: Decimal, exchangerate_key: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
-    url = "https://api.exchangerate.host/convert"
-    params: Dict[str, str] = {"from": local_currency, "to": "USD", "amount": str(amount)}
+async def get_weather(session: aiohttp.ClientSession, sem: asyncio.Semaphore, coords: List[Tuple[float, float]]) -> Tuple[List[Optional[Dict[str, Any]]], Optional[str]]:
+    now = time.monotonic()
+    keys = [(round(lat, 2), round(lon, 2)) for lat, lon in coords]
+
+    # drop expired entries once per window so the cache only holds the last TTL's worth
+    expired = [key for key, (fetched_at, _) in WEATHER_CACHE.items() if now - fetched_at >= WEATHER_TTL]
+    for key in expired:
+        del WEATHER_CACHE[key]
+
+    missing: Dict[Tuple[float, float], Tuple[float, float]] = {}
+    for key, coord in zip(keys, coords):
+        cached = WEATHER_CACHE.get(key)
+        if not (cached and now - cached[0] < WEATHER_TTL):
+            missing.setdefault(key, coord)
+
+    async def fetch(batch: List[Tuple[Tuple[float, float], Tuple[float, float]]]) -> Optional[str]:
+        async with sem:
+            return await fetch_weather_batch(session, batch)
+
+    pending = list(missing.items())
+    batches = [pending[i:i + WEATHER_BATCH] for i in range(0, len(pending), WEATHER_BATCH)]
+    errs = await asyncio.gather(*(fetch(batch) for batch in batches))
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for key in keys:
+        cached = WEATHER_CACHE.get(key)
+        results.append(cached[1] if cached and now - cached[0] < WEATHER_TTL else None)
+    return results, next((e for e in errs if e), None)
+
+async def fetch_usd_rates(session: aiohttp.ClientSession, exchangerate_key: Optional[str] = None) -> Tuple[Optional[Dict[str, float]], Optional[str]]:
+    # one request for the whole rate table; rows are then converted locally
+    url = "https://api.exchangerate.host/latest"
+    params: Dict[str, str] = {"base": "USD"}
     if exchangerate_key:
         params["access_key"] = exchangerate_key
 
-    data, err = safe_get(session, url, params)
+    data, err = await safe_get(session, url, params, RATE_LIMITS.get("fx"))
     if err:
         return None, err
 
-    result = (data or {}).get("result")
-    info = (data or {}).get("info", {}) or {}
-    rate = info.get("rate")
-
-    if rate is None and result is not None:
-        try:
-            rate = float(result) / float(amount)
-        except Exception:
-            pass
+    rates = data.get("rates") if data else None
+    if not rates:
+        return None, f"FX rate table unavailable: {data}"
 
-    if result is None or rate is None:
-        return None, f"FX conversion failed: {data}"
+    # the API quotes units of local currency per 1 USD; invert once here so each
+    # row is a single lookup and multiply
+    usd_rates = {currency: 1 / float(rate) for currency, rate in rates.items() if rate}
+    usd_rates["USD"] = 1.0
+    return usd_rates, None
 
-    return {"fx_rate_to_usd": rate, "amount_usd": result}, None
+def convert_fx_to_usd(usd_rates: Dict[str, float], local_currency: str, amount: float) -> Tuple[Optional[Tuple[float, float]], Optional[str]]:
+    # returns (fx_rate_to_usd, amount_usd)
+    fx_rate = usd_rates.get(local_currency)
+    if fx_rate is None:
+        return None, f"No USD rate for {local_currency}"
+    return (fx_rate, amount * fx_rate), None
 
 # ---------- Main ----------
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Enrich expenses and output CSV")
-    parser.add_argument("--input", "-i", default="expenses.csv", help="Input CSV path")
-    parser.add_argument("--output", "-o", default="enriched_expenses.csv", help="Output CSV path")
-    parser.add_argument("--sleep", type=float, default=0.5, help="Sleep between API calls (seconds)")
-    parser.add_argument("--fx-key", type=str, default=None, help="Optional exchangerate.host access key")
-    args = parser.parse_args()
+@dataclass
+class Enriched:
+    """One output row; field order is the output column order."""
+    # declared by hand rather than dataclass(slots=True), which needs Python 3.10;
+    # slots rule out field defaults, so every field is passed explicitly
+    __slots__ = (
+        "city", "country_code", "local_currency", "amount",
+        "fx_rate_to_usd", "amount_usd",
+        "latitude", "longitude",
+        "temperature_c", "windspeed_m_s",
+        "retrieved_at",
+        "errors",
+    )
+    city: str
+    country_code: str
+    local_currency: str
+    amount: str
+    fx_rate_to_usd: Optional[float]
+    amount_usd: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    temperature_c: Optional[float]
+    windspeed_m_s: Optional[float]
+    retrieved_at: str
+    errors: str
+
+FIELDNAMES = [f.name for f in fields(Enriched)]
+# reads an Enriched into a csv row without the deep copy dataclasses.astuple makes
+as_csv_row = attrgetter(*FIELDNAMES)
+
+# input columns, in the order rows are unpacked below
+INPUT_COLUMNS = ("city", "country_code", "local_currency", "amount")
+Row = Tuple[str, str, str, str]
+
+def iter_rows(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Row]:
+    if pacsv is not None and start == 0 and end is None:
+        # read record batches and hand out the needed columns row-wise; keep every value
+        # as a string so amounts round-trip exactly as written
+        convert = pacsv.ConvertOptions(
+            include_columns=list(INPUT_COLUMNS),
+            column_types={name: pa.string() for name in INPUT_COLUMNS},
+        )
+        with pacsv.open_csv(path, convert_options=convert) as reader:
+            for batch in reader:
+                yield from zip(*(batch.column(name).to_pylist() for name in INPUT_COLUMNS))
+        return
+
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+        idx = {name: i for i, name in enumerate(header)}
+        pick = itemgetter(*(idx[name] for name in INPUT_COLUMNS))
+
+        # a shard owns every line that starts inside [start, end); step back one byte so a
+        # line starting exactly at `start` is kept and a partial one is skipped
+        if start > f.tell():
+            f.seek(start - 1)
+            f.readline()
 
+        def lines() -> Iterator[str]:
+            while end is None or f.tell() < end:
+                line = f.readline()
+                if not line:
+                    return
+                yield line.decode("utf-8")
+
+        # csv.reader yields blank lines as empty lists; skip them
+        for r in csv.reader(lines()):
+            if r:
+                yield pick(r)
+
+def enrich_row(row: Row, geo: Dict[str, Any], weather: Optional[Dict[str, Any]], weather_err: Optional[str], rates: Optional[Dict[str, float]], rates_err: Optional[str], retrieved_at: str) -> Enriched:
+    city, country, currency, raw_amount = row
+
+    # built only when something fails; the happy path allocates nothing here
+    errors: Optional[str] = None
+
+    # Weather
+    if not weather:
+        errors = f"weather: {weather_err or 'No current weather'}"
+
+    # FX conversion
+    if rates:
+        fx, err = convert_fx_to_usd(rates, currency, float(raw_amount))
+    else:
+        fx, err = None, rates_err
+    if not fx:
+        errors = (errors + "; " if errors else "") + f"fx: {err}"
+
+    return Enriched(
+        city, country, currency, raw_amount,
+        fx[0] if fx else None,
+        f"{fx[1]:.2f}" if fx else None,
+        geo.get("latitude"),
+        geo.get("longitude"),
+        weather.get("temperature") if weather else None,
+        weather.get("windspeed") if weather else None,
+        retrieved_at,
+        errors or "",
+    )
+
+async def enrich_window(rows: List[Row], sem: asyncio.Semaphore, session: aiohttp.ClientSession, rates_task: "asyncio.Task[Tuple[Optional[Dict[str, float]], Optional[str]]]") -> List[Enriched]:
+    # geocode every row, then fetch weather for all located rows in batches
+    geos = await asyncio.gather(*(geocode_city(session, sem, row[0], row[1]) for row in rows))
+    located = [(row, geo) for row, (geo, _) in zip(rows, geos) if geo]
+    coords = [(geo["latitude"], geo["longitude"]) for _, geo in located]
+    weathers, weather_err = await get_weather(session, sem, coords)
+    # already resolved after the first window
+    rates, rates_err = await rates_task
+
+    # one timestamp for the whole window, taken once its data has arrived
+    retrieved_at = datetime.now(timezone.utc).isoformat()
+
+    # rows that failed geocoding are skipped
+    return [
+        enrich_row(row, geo, weather, weather_err, rates, rates_err, retrieved_at)
+        for (row, geo), weather in zip(located, weathers)
+    ]
+
+def set_rate_limits(args: argparse.Namespace, workers: int = 1) -> None:
+    # requests per minute for each API; 0 leaves it unthrottled. Shards split the quota
+    for api, rate in (("geocode", args.geo_rate), ("weather", args.weather_rate), ("fx", args.fx_rate)):
+        if rate > 0:
+            RATE_LIMITS[api] = RateLimiter(rate / workers, 60)
+
+async def enrich_file(args: argparse.Namespace, output: str, start: int = 0, end: Optional[int] = None, header: bool = True) -> None:
     # fallback to env variable
     fx_key = args.fx_key or os.environ.get("FX_API_KEY")
 
-    session = make_session()
-
-    # read CSV
-    with open(args.input, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-
-    enriched_rows = []
-    for idx, row in enumerate(rows, start=1):
-        city = row["city"]
-        country = row["country_code"]
-        currency = row["local_currency"]
-        amount = Decimal(row["amount"])
-
-        errors: List[str] = []
-
-        # Geocode
-        geo, err = geocode_city(session, city, country)
-        if not geo:
-            errors.append(f"geocode: {err}")
-            continue
-        lat, lon = geo.get("latitude"), geo.get("longitude")
-
-        # Weather
-        weather, err = get_weather(session, lat, lon)
-        if not weather:
-            errors.append(f"weather: {err}")
-
-        # FX conversion
-        fx, err = convert_fx_to_usd(session, currency, amount, exchangerate_key=fx_key)
-        if not fx:
-            errors.append(f"fx: {err}")
-
-        enriched_rows.append({
-            "city": city,
-            "country_code": country,
-            "local_currency": currency,
-            "amount": amount,
-            "latitude": lat,
-            "longitude": lon,
-            "temperature_c": weather.get("temperature") if weather else None,
-            "windspeed_m_s": weather.get("windspeed") if weather else None,
-            "fx_rate_to_usd": fx.get("fx_rate_to_usd") if fx else None,
-            "amount_usd": fx.get("amount_usd") if fx else None,
-            "retrieved_at": datetime.now(timezone.utc).isoformat(),
-            "errors": "; ".join(errors) if errors else ""
-        })
-
-        time.sleep(args.sleep)
-
-    # write output CSV
-
-    with open(args.output, "w", newline="", encoding="utf-8") as f:
-        fieldnames = [
-            "city", "country_code", "local_currency", "amount",
-            "fx_rate_to_usd","amount_usd",
-            "latitude", "longitude",
-            "temperature_c", "windspeed_m_s",
-            "retrieved_at",
-              "errors"
-        ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(enriched_rows)
+    sem = asyncio.Semaphore(args.concurrency)
+    async with make_session(args.concurrency) as session:
+        # the rate table is only needed once rows are geocoded, so fetch it alongside the first window
+        rates_task = asyncio.create_task(fetch_usd_rates(session, fx_key))
+
+        # stream the CSV through in windows so memory stays bounded and output appears early
+        rows_in = iter_rows(args.input, start, end)
+        try:
+            with open(output, "w", newline="", encoding="utf-8") as dst:
+                writer = csv.writer(dst)
+                if header:
+                    writer.writerow(FIELDNAMES)
+
+                while True:
+                    rows = list(islice(rows_in, args.window))
+                    if not rows:
+                        break
+                    writer.writerows(map(as_csv_row, await enrich_window(rows, sem, session, rates_task)))
+                    dst.flush()
+        finally:
+            # still pending if the input had no rows or a window failed; settle it
+            # before the session closes
+            rates_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await rates_task
+
+def run_loop(coro: Any) -> Any:
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
 
+def run(args: argparse.Namespace) -> int:
+    if args.geo_cache:
+        load_geo_cache(args.geo_cache)
+        atexit.register(save_geo_cache, args.geo_cache)
+
+    set_rate_limits(args)
+    run_loop(enrich_file(args, args.output))
 
     print(f"✅ Enriched data written to {args.output}")
     return 0
 
+# ---------- Sharding ----------
+
+def shard_ranges(path: str, shards: int) -> List[Tuple[int, int]]:
+    # split the data rows (everything after the header) into byte ranges of roughly equal size
+    size = os.stat(path).st_size
+    with open(path, "rb") as f:
+        body = len(f.readline())
+    step = max(1, (size - body) // shards)
+    bounds = [min(body + k * step, size) for k in range(shards)] + [size]
+    return [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if lo < hi]
+
+def run_shard(args: argparse.Namespace, start: int, end: int, output: str, shards: int) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    # runs in a worker process with its own event loop and connection pool; returns the
+    # geocodes it knows so the parent can merge and persist them
+    if args.geo_cache:
+        load_geo_cache(args.geo_cache)
+    set_rate_limits(args, shards)
+    run_loop(enrich_file(args, output, start, end, header=False))
+    return GEO_CACHE
+
+def run_sharded(args: argparse.Namespace) -> int:
+    if args.geo_cache:
+        load_geo_cache(args.geo_cache)
+        atexit.register(save_geo_cache, args.geo_cache)
+
+    # small inputs can yield fewer shards than --workers; the quota is split among those that run
+    ranges = shard_ranges(args.input, args.workers)
+    parts = [f"{args.output}.part{k}" for k in range(len(ranges))]
+    try:
+        with ProcessPoolExecutor(max_workers=len(ranges) or 1) as pool:
+            futures = [pool.submit(run_shard, args, start, end, part, len(ranges)) for (start, end), part in zip(ranges, parts)]
+            for future in futures:
+                GEO_CACHE.update(future.result())
+
+        # shards are written without a header; stitch them together in input order
+        with open(args.output, "w", newline="", encoding="utf-8") as dst:
+            csv.writer(dst).writerow(FIELDNAMES)
+            for part in parts:
+                with open(part, newline="", encoding="utf-8") as src:
+                    shutil.copyfileobj(src, dst)
+    finally:
+        for part in parts:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(part)
+
+    print(f"✅ Enriched data written to {args.output}")
+    return 0
+
+# ---------- Entry point ----------
+
+def non_negative_float(value: str) -> float:
+    rate = float(value)
+    if rate < 0:
+        raise argparse.ArgumentTypeError(f"must be >= 0, got {value}")
+    return rate
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {value}")
+    return number
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Enrich expenses and output CSV")
+    parser.add_argument("--input", "-i", default="expenses.csv", help="Input CSV path")
+    parser.add_argument("--output", "-o", default="enriched_expenses.csv", help="Output CSV path")
+    parser.add_argument("--window", "-w", type=positive_int, default=500, help="Rows read, enriched and written per window")
+    parser.add_argument("--workers", "-j", type=int, default=1, help="Processes to shard the input across (for very large CSVs)")
+    parser.add_argument("--concurrency", "-c", type=positive_int, default=10, help="Max rows enriched concurrently")
+    parser.add_argument("--geo-rate", type=non_negative_float, default=600, help="Max geocoding requests per minute (0 = unlimited)")
+    parser.add_argument("--weather-rate", type=non_negative_float, default=600, help="Max weather requests per minute (0 = unlimited)")
+    parser.add_argument("--fx-rate", type=non_negative_float, default=60, help="Max FX requests per minute (0 = unlimited)")
+    parser.add_argument("--geo-cache", default="geocache.json", help="Geocode cache file (empty string disables it)")
+    parser.add_argument("--fx-key", type=str, default=None, help="Optional exchangerate.host access key")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        return run_sharded(args)
+    return run(args)
+
 
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import enrich_exp_new
+from enrich_exp_new import RateLimiter, iter_rows, shard_ranges
+
+HEADER = "city,country_code,local_currency,amount\n"
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_fractional_rate_acquires(self):
+        async def acquire() -> None:
+            await asyncio.wait_for(RateLimiter(0.5, 60).acquire(), timeout=1)
+
+        asyncio.run(acquire())
+
+    def test_limiter_built_outside_the_loop(self):
+        # a drained bucket makes the second caller wait on the lock
+        limiter = RateLimiter(60, 1)
+        limiter.tokens = 0
+
+        async def acquire_twice() -> None:
+            await asyncio.wait_for(asyncio.gather(limiter.acquire(), limiter.acquire()), timeout=1)
+
+        asyncio.run(acquire_twice())
+
+
+
+class ShardingTest(unittest.TestCase):
+    def setUp(self):
+        # the byte-range reader is the csv path; keep pyarrow out of the comparison
+        self._pacsv = enrich_exp_new.pacsv
+        enrich_exp_new.pacsv = None
+        fd, self.path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+
+    def tearDown(self):
+        enrich_exp_new.pacsv = self._pacsv
+        os.remove(self.path)
+
+    def write(self, lines):
+        with open(self.path, "w", newline="", encoding="utf-8") as f:
+            f.write(HEADER + "".join(lines))
+        return [tuple(line.rstrip("\n").split(",")) for line in lines]
+
+    def sharded(self, shards):
+        return [row for start, end in shard_ranges(self.path, shards) for row in iter_rows(self.path, start, end)]
+
+    def test_boundaries_on_line_starts(self):
+        # equal-length lines, so every split lands exactly on a line start
+        rows = self.write([f"City{i},XX,EUR,{i}\n" for i in range(6)])
+        for shards in (1, 2, 3, 6):
+            self.assertEqual(self.sharded(shards), rows)
+
+    def test_boundaries_mid_line(self):
+        rows = self.write([f"{'C' * (i + 1)},XX,EUR,{i}.5\n" for i in range(10)])
+        for shards in (2, 3, 4, 7):
+            self.assertEqual(self.sharded(shards), rows)
+
+    def test_every_split_offset(self):
+        rows = self.write([f"{'C' * (i % 4 + 1)},XX,EUR,{i}\n" for i in range(8)])
+        body, size = len(HEADER), os.path.getsize(self.path)
+        for split in range(body, size + 1):
+            got = list(iter_rows(self.path, body, split)) + list(iter_rows(self.path, split, size))
+            self.assertEqual(got, rows, f"split at byte {split}")
+
+    def test_more_shards_than_lines(self):
+        rows = self.write(["Berlin,DE,EUR,1\n", "Tokyo,JP,JPY,2\n", "Paris,FR,EUR,3\n"])
+        self.assertGreater(len(shard_ranges(self.path, 50)), len(rows))
+        self.assertEqual(self.sharded(50), rows)
+
+    def test_header_only(self):
+        self.write([])
+        self.assertEqual(shard_ranges(self.path, 4), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,21 +1,41 @@
-from fastapi import FastAPI, HTTPException
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
-import httpx,requests
+import aiohttp
+import orjson
+import asyncio
 import os
 
-app = FastAPI()
 load_dotenv()
 
 GEO_URL = "http://api.openweathermap.org/geo/1.0/direct"
 WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
 Github_URL = "https://api.github.com/users/"
 
+# username -> (ETag, response) for conditional GETs; GitHub answers a matching
+# If-None-Match with 304, which is tiny and doesn't count against the rate limit
+GITHUB_CACHE_SIZE = 10_000
+GITHUB_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+
 API_KEY = os.getenv("OPENWEATHER_API_KEY")
 if not API_KEY:
     raise RuntimeError("Please set expo in your environment")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one pooled session for the app's lifetime instead of one per request
+    connector = aiohttp.TCPConnector(limit=100, keepalive_timeout=60, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=10)
+    app.state.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    yield
+    await app.state.session.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
 @app.get("/get_weather/{city}")
-async def get_weather(city: str):
+async def get_weather(city: str, request: Request):
     """
     Path Parameter: /get_weather/{city}
     Example: /get_weather/London
@@ -25,20 +45,20 @@ async def get_weather(city: str):
       2. Get weather using lat/lon
     """
 
+    session = request.app.state.session
+
     # 1. Get coordinates for the city
     try:
-        async with httpx.AsyncClient() as client:
-            geo_resp = await client.get(
-                GEO_URL,
-                params={"q": city, "appid": API_KEY, "limit": 1}
-            )
-    except httpx.RequestError as e:
+        async with session.get(
+            GEO_URL,
+            params={"q": city, "appid": API_KEY, "limit": 1}
+        ) as geo_resp:
+            if geo_resp.status != 200:
+                raise HTTPException(status_code=geo_resp.status, detail="Error fetching coordinates")
+            geo_data = orjson.loads(await geo_resp.read())
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         raise HTTPException(status_code=502, detail=f"Geo API unreachable: {e}")
 
-    if geo_resp.status_code != 200:
-        raise HTTPException(status_code=geo_resp.status_code, detail="Error fetching coordinates")
-
-    geo_data = geo_resp.json()
     if not geo_data:  # empty list = invalid city
         raise HTTPException(status_code=404, detail="Invalid city name")
 
@@ -47,19 +67,16 @@ async def get_weather(city: str):
 
     # 2. Get weather using coordinates
     try:
-        async with httpx.AsyncClient() as client:
-            weather_resp = await client.get(
-                WEATHER_URL,
-                params={"lat": lat, "lon": lon, "appid": API_KEY, "units": "metric"}
-            )
-    except httpx.RequestError as e:
+        async with session.get(
+            WEATHER_URL,
+            params={"lat": lat, "lon": lon, "appid": API_KEY, "units": "metric"}
+        ) as weather_resp:
+            if weather_resp.status != 200:
+                raise HTTPException(status_code=weather_resp.status, detail="Error fetching weather data")
+            weather_data = orjson.loads(await weather_resp.read())
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         raise HTTPException(status_code=502, detail=f"Weather API unreachable: {e}")
 
-    if weather_resp.status_code != 200:
-        raise HTTPException(status_code=weather_resp.status_code, detail="Error fetching weather data")
-
-    weather_data = weather_resp.json()
-
     # Extract the required fields
     return {
         "city": city,
@@ -68,25 +85,42 @@ async def get_weather(city: str):
     }
 @app.get("/get_github_user")
 
-def get_github_user(username: str ):
+async def get_github_user(username: str, request: Request):
+    key = username.lower()
+    cached = GITHUB_CACHE.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+
     try :
-        response = requests.get(f"{Github_URL}{username}")
-        if response.status_code == 200:
-            #print(response.status_code)
-            data = response.json()
-        elif response.status_code == 403:
-            raise HTTPException(status_code=403, detail="API rate limit exceeded")
-        elif response.status_code == 404:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        #print(data.get("login"))
-        return {
+        async with request.app.state.session.get(f"{Github_URL}{username}", headers=headers) as response:
+            if response.status == 304 and cached:
+                GITHUB_CACHE.move_to_end(key)
+                return cached[1]
+            elif response.status == 403:
+                raise HTTPException(status_code=403, detail="API rate limit exceeded")
+            elif response.status == 404:
+                raise HTTPException(status_code=404, detail="User not found")
+            elif response.status != 200:
+                raise HTTPException(status_code=response.status, detail="Error fetching GitHub user")
+            data = orjson.loads(await response.read())
+            etag = response.headers.get("ETag")
+
+        user = {
             "login": data.get("login"),
             "name": data.get("name"),
             "public_repos": data.get("public_repos"),
             "followers": data.get("followers"),
             "following": data.get("following")
         }
-    except requests.RequestException as e:
+        if etag:
+            GITHUB_CACHE[key] = (etag, user)
+            GITHUB_CACHE.move_to_end(key)
+            if len(GITHUB_CACHE) > GITHUB_CACHE_SIZE:
+                GITHUB_CACHE.popitem(last=False)
+        return user
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         raise HTTPException(status_code=500, detail=f"External API request failed: {str(e)}")
 
+if __name__ == "__main__":
+    import uvicorn
+    # httptools instead of the h11 parser; "auto" picks uvloop when installed (not on Windows)
+    uvicorn.run("weatherAPI_githubUser:app", host="127.0.0.1", port=8000, loop="auto", http="httptools", workers=4)